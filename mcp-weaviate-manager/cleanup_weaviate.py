@@ -94,42 +94,77 @@ class WeaviateCleanup:
         
         # Migrate data from existing knowledge collections
         knowledge_collections = ["Knowledge", "KnowledgeV3", "CohereKnowledge"]
+        # Only the fields the unified schema consumes - fetching whole
+        # objects hauls every property over the wire for nothing
+        source_props = ["title", "content", "question", "answer", "context",
+                        "source", "category", "domain", "tags", "confidence",
+                        "createdAt"]
         migrated_count = 0
-        
+
+        # The legacy collections carry differing subsets of these fields
+        # (hence the title/question and content/answer fallbacks in the
+        # mapping below), and Get rejects a query naming a property the
+        # class lacks - so project only what each class actually has
+        schema = self.client.schema.get()
+        class_props = {cls.get('class'): {p.get('name') for p in cls.get('properties', [])}
+                       for cls in schema.get('classes', [])}
+
         for collection in knowledge_collections:
+            if collection not in class_props:
+                print(f"Skipping {collection}: not present in schema")
+                continue
+            fetch_props = [p for p in source_props if p in class_props[collection]]
             try:
-                result = self.client.query.get(collection).do()
-                objects = result.get('data', {}).get('Get', {}).get(collection, [])
-                
-                for obj in objects:
-                    # Map to unified schema
-                    unified_obj = {
-                        "title": obj.get("title", obj.get("question", "")),
-                        "content": obj.get("content", obj.get("answer", "")),
-                        "question": obj.get("question", ""),
-                        "answer": obj.get("answer", ""),
-                        "context": obj.get("context", ""),
-                        "source": obj.get("source", collection),
-                        "category": obj.get("category", obj.get("domain", "")),
-                        "tags": obj.get("tags", []),
-                        "confidence": obj.get("confidence", 1.0),
-                        "createdAt": obj.get("createdAt", datetime.now().isoformat()),
-                        "metadata": json.dumps({
-                            "original_collection": collection,
-                            "migrated_at": datetime.now().isoformat()
-                        })
-                    }
-                    
-                    # Remove None values
-                    unified_obj = {k: v for k, v in unified_obj.items() if v is not None}
-                    
-                    try:
-                        self.client.data_object.create(unified_obj, "UnifiedKnowledge")
-                        migrated_count += 1
-                    except Exception as e:
-                        print(f"Failed to migrate object: {e}")
-                
-                print(f"Migrated {len(objects)} objects from {collection}")
+                collection_count = 0
+                # Page through the collection with the cursor API instead of
+                # pulling every object into memory in one unbounded query
+                last_id = None
+                while True:
+                    query = (self.client.query
+                             .get(collection, fetch_props)
+                             .with_additional(["id"])
+                             .with_limit(1000))
+                    if last_id:
+                        query = query.with_after(last_id)
+                    result = query.do()
+                    objects = result.get('data', {}).get('Get', {}).get(collection, [])
+                    if not objects:
+                        break
+
+                    for obj in objects:
+                        # Map to unified schema
+                        unified_obj = {
+                            "title": obj.get("title", obj.get("question", "")),
+                            "content": obj.get("content", obj.get("answer", "")),
+                            "question": obj.get("question", ""),
+                            "answer": obj.get("answer", ""),
+                            "context": obj.get("context", ""),
+                            "source": obj.get("source", collection),
+                            "category": obj.get("category", obj.get("domain", "")),
+                            "tags": obj.get("tags", []),
+                            "confidence": obj.get("confidence", 1.0),
+                            "createdAt": obj.get("createdAt", datetime.now().isoformat()),
+                            "metadata": json.dumps({
+                                "original_collection": collection,
+                                "migrated_at": datetime.now().isoformat()
+                            })
+                        }
+
+                        # Remove None values
+                        unified_obj = {k: v for k, v in unified_obj.items() if v is not None}
+
+                        try:
+                            self.client.data_object.create(unified_obj, "UnifiedKnowledge")
+                            migrated_count += 1
+                        except Exception as e:
+                            print(f"Failed to migrate object: {e}")
+
+                    collection_count += len(objects)
+                    if len(objects) < 1000:
+                        break
+                    last_id = objects[-1]["_additional"]["id"]
+
+                print(f"Migrated {collection_count} objects from {collection}")
                 
             except Exception as e:
                 print(f"Error migrating {collection}: {e}")
@@ -7,10 +7,12 @@ Provides a unified interface to connect Weaviate with all other MCP servers
 import asyncio
 import json
 import logging
+import sys
+import time
 from typing import Any, Dict, List, Optional
-from datetime import datetime
-import subprocess
 import os
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
 from mcp.server.models import InitializationOptions
 from mcp.server import NotificationOptions, Server
 from mcp.server.stdio import stdio_server
@@ -21,135 +23,269 @@ from mcp.types import TextContent
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Compact encoder shared by all responses: the MCP transport is
+# machine-to-machine, so skip the pretty-printer path and the ~3x byte
+# overhead of indent=2. orjson (already in requirements.txt) serializes at
+# C speed; fall back to the stdlib encoder where it is not installed.
+try:
+    import orjson
+
+    def _encode(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+# The Weaviate manager lives alongside this file; import it once at module
+# load instead of re-appending sys.path on every connect attempt
+WEAVIATE_DIR = os.path.dirname(os.path.abspath(__file__))
+if WEAVIATE_DIR not in sys.path:
+    sys.path.insert(0, WEAVIATE_DIR)
+from server import weaviate_manager as _weaviate_manager
+
 class MCPIntegrationHub:
-    """Central hub for managing all MCP tool connections"""
-    
+    """Central hub for managing all MCP tool connections
+
+    Server configs are a lightweight metadata registry (name, description,
+    trigger keywords). No subprocess is spawned until a tool call actually
+    needs that server - see _ensure().
+    """
+
     def __init__(self):
         self.connected_servers = {}
+        self._sessions: Dict[str, ClientSession] = {}
+        # Per-server lifecycle tasks: name -> (task, stop event). Each child
+        # server's contexts are entered and exited inside its own task - see
+        # _ensure() for why
+        self._lifecycles: Dict[str, Any] = {}
+        # In-progress spawns: name -> ready future, registered before the
+        # first await so concurrent callers share one spawn
+        self._pending: Dict[str, Any] = {}
         self.server_configs = {
             "weaviate": {
                 "name": "weaviate-manager",
                 "path": "/Users/dp/CascadeProjects/mcp max v2/mcp-weaviate-manager/server.py",
-                "description": "Weaviate vector database management"
+                "description": "Weaviate vector database management",
+                "keywords": ["vector", "search", "schema", "knowledge"]
             },
             "filesystem": {
                 "name": "filesystem",
                 "command": ["npx", "-y", "@modelcontextprotocol/server-filesystem"],
                 "args": ["/Users/dp/CascadeProjects/mcp max v2"],
-                "description": "File system operations"
+                "description": "File system operations",
+                "keywords": ["file", "directory", "read", "write"]
             },
             "github": {
                 "name": "github",
                 "command": ["npx", "-y", "@modelcontextprotocol/server-github"],
                 "env": {"GITHUB_PERSONAL_ACCESS_TOKEN": os.getenv("GITHUB_TOKEN", "")},
-                "description": "GitHub repository management"
+                "description": "GitHub repository management",
+                "keywords": ["repository", "issue", "pull request", "commit"]
             },
             "gitlab": {
                 "name": "gitlab",
                 "command": ["npx", "-y", "@modelcontextprotocol/server-gitlab"],
                 "env": {"GITLAB_PERSONAL_ACCESS_TOKEN": os.getenv("GITLAB_TOKEN", "")},
-                "description": "GitLab repository management"
+                "description": "GitLab repository management",
+                "keywords": ["repository", "merge request", "pipeline"]
             },
             "google-maps": {
                 "name": "google-maps",
                 "command": ["npx", "-y", "@modelcontextprotocol/server-google-maps"],
                 "env": {"GOOGLE_MAPS_API_KEY": os.getenv("GOOGLE_MAPS_API_KEY", "")},
-                "description": "Google Maps integration"
+                "description": "Google Maps integration",
+                "keywords": ["location", "directions", "geocode", "places"]
             },
             "slack": {
                 "name": "slack",
                 "command": ["npx", "-y", "@modelcontextprotocol/server-slack"],
                 "env": {"SLACK_BOT_TOKEN": os.getenv("SLACK_BOT_TOKEN", "")},
-                "description": "Slack workspace integration"
+                "description": "Slack workspace integration",
+                "keywords": ["message", "channel", "workspace"]
             },
             "postgres": {
                 "name": "postgres",
                 "command": ["npx", "-y", "@modelcontextprotocol/server-postgres"],
                 "args": [os.getenv("POSTGRES_CONNECTION_STRING", "")],
-                "description": "PostgreSQL database operations"
+                "description": "PostgreSQL database operations",
+                "keywords": ["sql", "database", "query", "table"]
             },
             "sqlite": {
                 "name": "sqlite",
                 "command": ["npx", "-y", "@modelcontextprotocol/server-sqlite"],
                 "args": ["--db-path", "/Users/dp/CascadeProjects/mcp max v2/data/sqlite.db"],
-                "description": "SQLite database operations"
+                "description": "SQLite database operations",
+                "keywords": ["sql", "database", "local", "table"]
             },
             "time": {
                 "name": "time",
                 "command": ["npx", "-y", "@modelcontextprotocol/server-time"],
-                "description": "Time and timezone utilities"
+                "description": "Time and timezone utilities",
+                "keywords": ["time", "timezone", "date"]
             },
             "fetch": {
                 "name": "fetch",
                 "command": ["npx", "-y", "@modelcontextprotocol/server-fetch"],
-                "description": "HTTP/HTTPS fetch operations"
+                "description": "HTTP/HTTPS fetch operations",
+                "keywords": ["http", "url", "download", "request"]
             },
             "memory": {
                 "name": "memory",
                 "command": ["npx", "-y", "@modelcontextprotocol/server-memory"],
-                "description": "Knowledge graph memory"
+                "description": "Knowledge graph memory",
+                "keywords": ["memory", "graph", "entity", "remember"]
             },
             "puppeteer": {
                 "name": "puppeteer",
                 "command": ["npx", "-y", "@modelcontextprotocol/server-puppeteer"],
-                "description": "Browser automation"
+                "description": "Browser automation",
+                "keywords": ["browser", "screenshot", "navigate", "click"]
             },
             "brave-search": {
                 "name": "brave-search",
                 "command": ["npx", "-y", "@modelcontextprotocol/server-brave-search"],
                 "env": {"BRAVE_API_KEY": os.getenv("BRAVE_API_KEY", "")},
-                "description": "Brave search integration"
+                "description": "Brave search integration",
+                "keywords": ["search", "web", "news"]
             },
             "exa": {
                 "name": "exa",
                 "command": ["npx", "-y", "@modelcontextprotocol/server-exa"],
                 "env": {"EXA_API_KEY": os.getenv("EXA_API_KEY", "")},
-                "description": "Exa search integration"
+                "description": "Exa search integration",
+                "keywords": ["search", "semantic", "web"]
             }
         }
-    
-    def get_server_status(self) -> Dict[str, Any]:
-        """Get status of all configured MCP servers"""
-        status = {
-            "total_servers": len(self.server_configs),
-            "connected": len(self.connected_servers),
-            "servers": []
-        }
-        
+
+        # Credentials are resolved from the environment at construction and
+        # never change afterwards, so snapshot the per-server status entries
+        # once instead of re-scanning env vars on every hub_status call
+        self._status_template: List[Dict[str, Any]] = []
         for name, config in self.server_configs.items():
             server_info = {
                 "name": name,
                 "description": config.get("description"),
-                "connected": name in self.connected_servers,
+                "connected": False,
                 "has_credentials": True
             }
-            
-            # Check if required environment variables are set
-            if "env" in config:
-                for env_var, value in config["env"].items():
-                    if not value:
-                        server_info["has_credentials"] = False
-                        server_info["missing_env"] = env_var
-            
-            status["servers"].append(server_info)
-        
-        return status
+            for env_var, value in config.get("env", {}).items():
+                if not value:
+                    server_info["has_credentials"] = False
+                    server_info["missing_env"] = env_var
+            self._status_template.append(server_info)
+
+    def get_server_status(self) -> Dict[str, Any]:
+        """Get status of all configured MCP servers"""
+        return {
+            "total_servers": len(self.server_configs),
+            "connected": len(self.connected_servers),
+            "servers": [{**info, "connected": info["name"] in self.connected_servers}
+                        for info in self._status_template]
+        }
     
+    async def _ensure(self, name: str) -> ClientSession:
+        """Lazily spawn and initialize the MCP server for `name` on first use"""
+        session = self._sessions.get(name)
+        if session is not None:
+            return session
+
+        # Another caller may already be spawning this server - wait on its
+        # ready future rather than starting a second lifecycle (which would
+        # orphan the first task and leak its subprocess)
+        pending = self._pending.get(name)
+        if pending is not None:
+            return await pending
+
+        config = self.server_configs.get(name)
+        if not config:
+            raise ValueError(f"Unknown server: {name}")
+        if "command" not in config:
+            raise ValueError(f"Server {name} is not stdio-backed")
+
+        logger.info(f"Spawning MCP server on demand: {name}")
+        params = StdioServerParameters(
+            command=config["command"][0],
+            args=config["command"][1:] + config.get("args", []),
+            env={**os.environ, **config.get("env", {})}
+        )
+
+        # The stdio_client/ClientSession contexts hold anyio cancel scopes,
+        # which must be exited in the task that entered them. A dedicated
+        # lifecycle task per server owns both contexts for its whole life;
+        # request-handler tasks only borrow the initialized session.
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        # Registered synchronously, before any await, so a concurrent call
+        # cannot race past the check above
+        self._pending[name] = ready
+        stop = asyncio.Event()
+
+        async def _lifecycle():
+            try:
+                async with stdio_client(params) as (read_stream, write_stream):
+                    async with ClientSession(read_stream, write_stream) as session:
+                        await session.initialize()
+                        ready.set_result(session)
+                        await stop.wait()
+            except Exception as e:
+                if not ready.done():
+                    ready.set_exception(e)
+                else:
+                    logger.warning(f"MCP server {name} terminated: {e}")
+            finally:
+                self._pending.pop(name, None)
+                self._sessions.pop(name, None)
+                self.connected_servers.pop(name, None)
+                self._lifecycles.pop(name, None)
+
+        task = asyncio.create_task(_lifecycle(), name=f"mcp-{name}-lifecycle")
+        self._lifecycles[name] = (task, stop)
+
+        try:
+            session = await ready
+        finally:
+            self._pending.pop(name, None)
+        self._sessions[name] = session
+        self.connected_servers[name] = session
+        return session
+
+    async def aclose(self):
+        """Shut down every child server spawned via _ensure()
+
+        Signals each lifecycle task to unwind its own contexts and waits for
+        them, so cancel scopes close in the task that opened them.
+        """
+        lifecycles = list(self._lifecycles.values())
+        for _, stop in lifecycles:
+            stop.set()
+        for task, _ in lifecycles:
+            try:
+                await task
+            except Exception as e:
+                logger.debug(f"Error shutting down child server: {e}")
+
+    async def call_server_tool(self, server_name: str, tool_name: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Call a tool on a child MCP server, connecting to it first if needed"""
+        try:
+            session = await self._ensure(server_name)
+            result = await session.call_tool(tool_name, arguments or {})
+            return {
+                "server": server_name,
+                "tool": tool_name,
+                "content": [c.text for c in result.content if hasattr(c, "text")]
+            }
+        except Exception as e:
+            return {"error": str(e)}
+
     async def connect_to_weaviate(self) -> Dict[str, Any]:
         """Connect to Weaviate MCP server and perform operations"""
         try:
-            # Import the Weaviate manager
-            import sys
-            sys.path.append('/Users/dp/CascadeProjects/mcp max v2/mcp-weaviate-manager')
-            from server import weaviate_manager
-            
-            # Connect to Weaviate
-            if weaviate_manager.connect():
-                self.connected_servers["weaviate"] = weaviate_manager
+            # Connect off-loop; the Weaviate SDK is blocking
+            if await asyncio.to_thread(_weaviate_manager.connect):
+                self.connected_servers["weaviate"] = _weaviate_manager
                 return {"status": "connected", "message": "Successfully connected to Weaviate"}
             else:
                 return {"status": "failed", "message": "Failed to connect to Weaviate"}
-                
+
         except Exception as e:
             return {"status": "error", "message": str(e)}
     
@@ -160,37 +296,47 @@ class MCPIntegrationHub:
         
         if "weaviate" in self.connected_servers:
             weaviate = self.connected_servers["weaviate"]
-            
+
             if operation == "search":
-                return weaviate.search_across_classes(query)
+                return await weaviate.search_across_classes(query)
             elif operation == "schema":
-                return weaviate.get_schema_info()
+                return await weaviate.get_schema_info()
             else:
                 return {"error": f"Unknown operation: {operation}"}
         else:
             return {"error": "Not connected to Weaviate"}
-    
-    def create_unified_search(self, query: str, sources: List[str] = None) -> Dict[str, Any]:
-        """Search across multiple MCP sources"""
+
+    async def create_unified_search(self, query: str, sources: List[str] = None) -> Dict[str, Any]:
+        """Search across multiple MCP sources concurrently"""
         if sources is None:
             sources = ["weaviate", "filesystem", "github"]
-        
+
         results = {
             "query": query,
             "sources": {},
-            "timestamp": datetime.now().isoformat()
+            # time.strftime avoids allocating a throwaway datetime per call
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime())
         }
-        
-        for source in sources:
-            if source == "weaviate" and source in self.connected_servers:
-                try:
-                    weaviate_results = self.connected_servers[source].search_across_classes(query, limit=5)
-                    results["sources"][source] = weaviate_results
-                except Exception as e:
-                    results["sources"][source] = {"error": str(e)}
-            else:
-                results["sources"][source] = {"status": "not_implemented"}
-        
+
+        # Bound fan-out so a long source list cannot stampede the backends
+        sem = asyncio.Semaphore(8)
+
+        async def search_source(source: str) -> Dict[str, Any]:
+            async with sem:
+                if source == "weaviate":
+                    if source not in self.connected_servers:
+                        await self.connect_to_weaviate()
+                    if source not in self.connected_servers:
+                        return {"error": "Not connected to Weaviate"}
+                    return await self.connected_servers[source].search_across_classes(query, limit=5)
+                return {"status": "not_implemented"}
+
+        outcomes = await asyncio.gather(*(search_source(s) for s in sources), return_exceptions=True)
+        for source, outcome in zip(sources, outcomes):
+            if isinstance(outcome, Exception):
+                outcome = {"error": str(outcome)}
+            results["sources"][source] = outcome
+
         return results
 
 # Initialize MCP server
@@ -238,6 +384,28 @@ async def handle_list_tools() -> List[Tool]:
                 "required": ["query"]
             }
         ),
+        Tool(
+            name="hub_call_tool",
+            description="Call a tool on any configured MCP server (spawned on demand)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "server": {
+                        "type": "string",
+                        "description": "Name of the configured MCP server"
+                    },
+                    "tool": {
+                        "type": "string",
+                        "description": "Name of the tool to call on that server"
+                    },
+                    "arguments": {
+                        "type": "object",
+                        "description": "Arguments to pass to the tool"
+                    }
+                },
+                "required": ["server", "tool"]
+            }
+        ),
         Tool(
             name="hub_unified_search",
             description="Search across multiple MCP sources",
@@ -275,40 +443,48 @@ async def handle_call_tool(name: str, arguments: Optional[Dict[str, Any]]) -> Li
             operation = arguments.get("operation", "search")
             result = await hub.query_weaviate(query, operation)
             
+        elif name == "hub_call_tool":
+            server_name = arguments.get("server")
+            tool_name = arguments.get("tool")
+            tool_args = arguments.get("arguments")
+            result = await hub.call_server_tool(server_name, tool_name, tool_args)
+
         elif name == "hub_unified_search":
             query = arguments.get("query")
             sources = arguments.get("sources")
-            result = hub.create_unified_search(query, sources)
+            result = await hub.create_unified_search(query, sources)
             
         else:
             result = {"error": f"Unknown tool: {name}"}
         
-        return [TextContent(type="text", text=json.dumps(result, indent=2))]
+        return [TextContent(type="text", text=_encode(result))]
         
     except Exception as e:
         logger.error(f"Error executing tool {name}: {e}")
-        return [TextContent(type="text", text=json.dumps({"error": str(e)}))]
+        return [TextContent(type="text", text=_encode({"error": str(e)}))]
 
 async def main():
     """Run the MCP Integration Hub server"""
     logger.info("Starting MCP Integration Hub...")
-    
-    # Initial connection to Weaviate
-    await hub.connect_to_weaviate()
-    
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="mcp-integration-hub",
-                server_version="1.0.0",
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
+
+    # No eager connections here - servers (including Weaviate) are connected
+    # lazily on first tool call so startup stays well under client timeouts
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                InitializationOptions(
+                    server_name="mcp-integration-hub",
+                    server_version="1.0.0",
+                    capabilities=server.get_capabilities(
+                        notification_options=NotificationOptions(),
+                        experimental_capabilities={},
+                    )
                 )
             )
-        )
+    finally:
+        await hub.aclose()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -5,24 +5,50 @@ Provides tools for managing, cleaning, and integrating with Weaviate vector data
 """
 
 import asyncio
+import heapq
 import json
 import logging
+import time
 from typing import Any, Dict, List, Optional
-from datetime import datetime
-import weaviate
-from weaviate.client import Client
+import requests
 from mcp.server.models import InitializationOptions
 from mcp.server import NotificationOptions, Server
 from mcp.server.stdio import stdio_server
 from mcp.tools import Tool
-from mcp.types import TextContent, ImageContent, EmbeddedResource
+from mcp.types import TextContent
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Compact encoder shared by all responses: the MCP transport is
+# machine-to-machine, so skip the pretty-printer path and the ~3x byte
+# overhead of indent=2. orjson (already in requirements.txt) serializes at
+# C speed; fall back to the stdlib encoder where it is not installed.
+try:
+    import orjson
+
+    def _encode(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
 # Weaviate configuration
 WEAVIATE_URL = "https://weaviate-production-5bc1.up.railway.app"
+SCHEMA_CACHE_TTL = 60  # seconds
+BM25_PREFILTER_MIN_SCORE = 0.1
+WEAVIATE_OP_TIMEOUT = 30  # seconds per tool operation
+BREAKER_FAILURES_TO_OPEN = 3
+BREAKER_OPEN_SECONDS = 10
+
+# Failures we treat as transient: serve stale/partial data rather than
+# erroring. Anything else (including KeyboardInterrupt/SystemExit, which a
+# bare except used to swallow) propagates. The weaviate-specific entry is
+# appended on first connect(), once the SDK is actually imported.
+_TRANSIENT_ERRORS = (
+    requests.RequestException,
+    asyncio.TimeoutError,
+)
 
 class WeaviateManager:
     """Manages Weaviate database operations"""
@@ -30,15 +56,39 @@ class WeaviateManager:
     def __init__(self, url: str):
         self.url = url
         self.client = None
-        
+        self._schema_cache = None
+        self._schema_cache_ts = 0.0
+        self._schema_refreshing = False
+        # Strong references to in-flight refresh tasks - the loop keeps
+        # only weak ones, so an unreferenced task can be collected mid-run
+        self._refresh_tasks = set()
+        self._meta_cache = None
+        self._text_props_index: Dict[str, List[str]] = {}
+        self._class_names: List[str] = []
+        self._last_counts: Dict[str, int] = {}
+        self._breaker = {"open_until": 0.0, "fails": 0}
+        self._last_good: Dict[str, Any] = {}
+
     def connect(self):
-        """Connect to Weaviate instance"""
+        """Connect to Weaviate instance (no-op if already connected)"""
+        if self.client is not None:
+            return True
+
+        # Deferred import: the weaviate SDK pulls in a heavy chain (grpc,
+        # validators, ...) that an interpreter serving only metadata tools
+        # never needs, and which can push startup past MCP client timeouts
+        global _TRANSIENT_ERRORS
+        import weaviate
+        if weaviate.exceptions.UnexpectedStatusCodeException not in _TRANSIENT_ERRORS:
+            _TRANSIENT_ERRORS += (weaviate.exceptions.UnexpectedStatusCodeException,)
+
         try:
-            self.client = weaviate.Client(
+            client = weaviate.Client(
                 url=self.url,
                 timeout_config=(5, 15)
             )
-            if self.client.is_ready():
+            if client.is_ready():
+                self.client = client
                 logger.info("Connected to Weaviate successfully")
                 return True
             else:
@@ -48,38 +98,159 @@ class WeaviateManager:
             logger.error(f"Failed to connect to Weaviate: {e}")
             return False
     
-    def get_schema_info(self) -> Dict[str, Any]:
+    def _index_schema(self, schema: Dict[str, Any]):
+        """Rebuild the derived per-class indexes from a fresh schema"""
+        self._class_names = [cls.get('class') for cls in schema.get('classes', [])]
+        self._text_props_index = {
+            cls.get('class'): [p['name'] for p in cls.get('properties', [])
+                               if 'text' in p.get('dataType', [])][:5]
+            for cls in schema.get('classes', [])
+        }
+
+    async def _refresh_schema(self):
+        """Refresh the cached schema in the background"""
+        if self._schema_refreshing:
+            return
+        self._schema_refreshing = True
+        try:
+            self._schema_cache = await asyncio.to_thread(self.client.schema.get)
+            self._schema_cache_ts = time.monotonic()
+            self._index_schema(self._schema_cache)
+        except Exception as e:
+            # Keep serving the stale copy; the next call retries the refresh
+            logger.debug(f"Schema refresh failed: {e}")
+        finally:
+            self._schema_refreshing = False
+
+    async def _get_schema_cached(self, ttl: float = SCHEMA_CACHE_TTL) -> Dict[str, Any]:
+        """Return the schema, serving a stale copy while revalidating in the background
+
+        The schema changes rarely, so repeated tool calls within the TTL never
+        pay the fetch; a stale cache is served immediately while a background
+        task refreshes it.
+        """
+        if self._schema_cache is None:
+            # Nothing to serve yet - fetch synchronously
+            self._schema_cache = await asyncio.to_thread(self.client.schema.get)
+            self._schema_cache_ts = time.monotonic()
+            self._index_schema(self._schema_cache)
+        elif time.monotonic() - self._schema_cache_ts > ttl:
+            task = asyncio.create_task(self._refresh_schema())
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+        return self._schema_cache
+
+    async def _get_meta_cached(self) -> Dict[str, Any]:
+        """Return server meta info, cached for the process lifetime"""
+        if self._meta_cache is None:
+            self._meta_cache = await asyncio.to_thread(self.client.get_meta)
+        return self._meta_cache
+
+    async def _aio(self, fn, *args, **kwargs):
+        """Run a blocking client call in a worker thread off the event loop"""
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def _guarded(self, op_name: str, op) -> Dict[str, Any]:
+        """Run an operation with a timeout and a circuit breaker
+
+        `op` is a zero-arg callable returning the operation coroutine - a
+        factory rather than a live coroutine, so the fail-fast path below can
+        bail without leaving an un-awaited coroutine behind.
+
+        A Railway stall would otherwise hang the server indefinitely and let
+        client retries pile up blocked coroutines. Consecutive failures open
+        the breaker briefly so further calls fail fast, serving the last good
+        result for that operation where one exists.
+        """
+        if time.monotonic() < self._breaker["open_until"]:
+            return {
+                "error": "weaviate unavailable",
+                "cached": True,
+                "data": self._last_good.get(op_name)
+            }
+
+        try:
+            result = await asyncio.wait_for(op(), timeout=WEAVIATE_OP_TIMEOUT)
+        except requests.exceptions.ConnectionError:
+            # A dropped connection is fatal to this client object, not a
+            # blip to absorb: propagate so the caller can rebuild the client
+            # and retry instead of serving stale data until restart
+            raise
+        except (asyncio.TimeoutError, *_TRANSIENT_ERRORS) as e:
+            self._record_failure()
+            return {
+                "error": str(e) or "weaviate timeout",
+                "cached": True,
+                "data": self._last_good.get(op_name)
+            }
+
+        if isinstance(result, dict) and "error" in result:
+            # The manager methods convert their own exceptions into error
+            # dicts, so a fast-failing backend surfaces here rather than as
+            # a raised exception - it must still move the breaker
+            self._record_failure()
+        elif isinstance(result, dict):
+            self._breaker["fails"] = 0
+            self._last_good[op_name] = result
+        return result
+
+    def _record_failure(self):
+        """Count one operation failure toward opening the circuit breaker"""
+        self._breaker["fails"] += 1
+        if self._breaker["fails"] >= BREAKER_FAILURES_TO_OPEN:
+            self._breaker["open_until"] = time.monotonic() + BREAKER_OPEN_SECONDS
+            self._breaker["fails"] = 0
+            logger.warning(f"Weaviate circuit breaker opened for {BREAKER_OPEN_SECONDS}s")
+
+    def _get_object_count(self, class_name: str) -> int:
+        """Get the object count for a single class (blocking)"""
+        result = self.client.query.aggregate(class_name).with_meta_count().do()
+        return result.get('data', {}).get('Aggregate', {}).get(class_name, [{}])[0].get('meta', {}).get('count', 0)
+
+    async def get_schema_info(self) -> Dict[str, Any]:
         """Get schema information including all classes and their properties"""
         if not self.client:
             return {"error": "Not connected to Weaviate"}
-        
+
         try:
-            schema = self.client.schema.get()
-            meta = self.client.get_meta()
-            
-            # Get detailed info for each class
+            schema = await self._get_schema_cached()
+            meta = await self._get_meta_cached()
+            classes = schema.get('classes', [])
+
+            # Fetch all per-class counts concurrently instead of one RTT at a time
+            counts = await asyncio.gather(
+                *(asyncio.to_thread(self._get_object_count, cls.get('class')) for cls in classes),
+                return_exceptions=True
+            )
+
             class_info = []
-            for cls in schema.get('classes', []):
+            for cls, count in zip(classes, counts):
                 class_name = cls.get('class')
-                
-                # Get object count
-                try:
-                    result = self.client.query.aggregate(class_name).with_meta_count().do()
-                    count = result.get('data', {}).get('Aggregate', {}).get(class_name, [{}])[0].get('meta', {}).get('count', 0)
-                except:
-                    count = 0
-                
+                if isinstance(count, BaseException):
+                    if not isinstance(count, _TRANSIENT_ERRORS):
+                        raise count
+                    # Transient failure: serve the previous count instead of
+                    # silently reporting zero
+                    logger.debug(f"Count for {class_name} failed: {count}")
+                    count = self._last_counts.get(class_name, 0)
+                else:
+                    self._last_counts[class_name] = count
                 class_info.append({
                     'name': class_name,
                     'object_count': count,
                     'properties': [{'name': p.get('name'), 'dataType': p.get('dataType')} for p in cls.get('properties', [])]
                 })
-            
+
             return {
                 'version': meta.get('version'),
-                'total_classes': len(schema.get('classes', [])),
+                'total_classes': len(classes),
                 'classes': class_info
             }
+        except requests.exceptions.ConnectionError:
+            # Must escape the blanket handler below: handle_call_tool
+            # rebuilds the client and retries on this, and an error dict
+            # would leave the dead client in place until restart
+            raise
         except Exception as e:
             return {"error": str(e)}
     
@@ -89,33 +260,51 @@ class WeaviateManager:
             return {"error": "Not connected to Weaviate"}
         
         try:
-            # Get all objects from the class
-            result = self.client.query.get(class_name).with_additional(['id', 'creationTimeUnix']).do()
-            objects = result.get('data', {}).get('Get', {}).get(class_name, [])
-            
-            if not objects:
+            # Total count via a cheap aggregate - no object payloads needed.
+            # A failed count propagates to the handlers below: defaulting to
+            # 0 would misreport a connection failure as an empty class.
+            total_objects = self._get_object_count(class_name)
+
+            if not total_objects:
                 return {"message": f"No objects found in class {class_name}"}
-            
+
             deleted_count = 0
-            
+
             # If keep_recent is True, only delete objects older than specified days
             if keep_recent:
-                cutoff_time = datetime.now().timestamp() - (days * 24 * 60 * 60)
-                for obj in objects:
-                    creation_time = obj.get('_additional', {}).get('creationTimeUnix', 0) / 1000
-                    if creation_time < cutoff_time:
-                        obj_id = obj.get('_additional', {}).get('id')
-                        if obj_id:
-                            self.client.data_object.delete(obj_id, class_name)
-                            deleted_count += 1
-            
+                cutoff_ms = int((time.time() - days * 24 * 60 * 60) * 1000)
+                # Server evaluates the filter and deletes in one request
+                # instead of one HTTP DELETE per object. Timestamp filters
+                # take the epoch-millis value as a string (valueText).
+                try:
+                    result = self.client.batch.delete_objects(
+                        class_name=class_name,
+                        where={
+                            "path": ["_creationTimeUnix"],
+                            "operator": "LessThan",
+                            "valueText": str(cutoff_ms)
+                        }
+                    )
+                except requests.exceptions.ConnectionError:
+                    raise
+                except Exception as e:
+                    return {
+                        "error": f"Timestamp-filtered delete failed: {e}. "
+                                 f"Filtering on _creationTimeUnix requires "
+                                 f"invertedIndexConfig.indexTimestamps to be "
+                                 f"enabled on class {class_name}."
+                    }
+                deleted_count = result.get("results", {}).get("successful", 0)
+
             return {
                 "class": class_name,
-                "total_objects": len(objects),
+                "total_objects": total_objects,
                 "deleted_objects": deleted_count,
-                "remaining_objects": len(objects) - deleted_count
+                "remaining_objects": total_objects - deleted_count
             }
-            
+
+        except requests.exceptions.ConnectionError:
+            raise
         except Exception as e:
             return {"error": str(e)}
     
@@ -125,37 +314,56 @@ class WeaviateManager:
             return {"error": "Not connected to Weaviate"}
         
         try:
-            # Get all objects from source class
-            result = self.client.query.get(source_class).with_additional(['id']).do()
-            source_objects = result.get('data', {}).get('Get', {}).get(source_class, [])
-            
-            if not source_objects:
-                return {"message": f"No objects found in source class {source_class}"}
-            
-            # Get schema for both classes
+            # Get schema for both classes first so the object fetch below can
+            # project only the properties the target can actually accept
             schema = self.client.schema.get()
             source_schema = next((c for c in schema['classes'] if c['class'] == source_class), None)
             target_schema = next((c for c in schema['classes'] if c['class'] == target_class), None)
-            
+
             if not source_schema or not target_schema:
                 return {"error": "Could not find schema for source or target class"}
-            
-            # Map properties
+
+            target_prop_names = {p['name'] for p in target_schema['properties']}
+            fetch_props = [p['name'] for p in source_schema['properties']
+                           if p['name'] in target_prop_names]
+
+            if not fetch_props:
+                return {"message": f"No overlapping properties between {source_class} and {target_class}"}
+
+            # Page through the source with a cursor instead of materializing
+            # the whole class in one unbounded response
+            source_objects = []
+            cursor = None
+            while True:
+                query = (self.client.query
+                        .get(source_class, fetch_props)
+                        .with_additional(['id'])
+                        .with_limit(500))
+                if cursor:
+                    query = query.with_after(cursor)
+                page = query.do().get('data', {}).get('Get', {}).get(source_class, [])
+                if not page:
+                    break
+                source_objects.extend(page)
+                cursor = page[-1].get('_additional', {}).get('id')
+                if len(page) < 500:
+                    break
+
+            if not source_objects:
+                return {"message": f"No objects found in source class {source_class}"}
+
+            # Map properties, coalescing creates into bulk requests instead of
+            # one HTTP POST per object
             migrated_count = 0
-            for obj in source_objects:
-                # Remove additional fields
-                obj_data = {k: v for k, v in obj.items() if not k.startswith('_')}
-                
-                # Only include properties that exist in target schema
-                target_props = {p['name'] for p in target_schema['properties']}
-                filtered_data = {k: v for k, v in obj_data.items() if k in target_props}
-                
-                if filtered_data:
-                    try:
-                        self.client.data_object.create(filtered_data, target_class)
+            with self.client.batch(batch_size=100, dynamic=True, num_workers=4) as batch:
+                for obj in source_objects:
+                    # target_prop_names is precomputed above; membership also
+                    # drops the _additional bookkeeping key in one pass
+                    filtered_data = {k: v for k, v in obj.items() if k in target_prop_names}
+
+                    if filtered_data:
+                        batch.add_data_object(filtered_data, target_class)
                         migrated_count += 1
-                    except Exception as e:
-                        logger.error(f"Failed to migrate object: {e}")
             
             return {
                 "source_class": source_class,
@@ -164,6 +372,8 @@ class WeaviateManager:
                 "migrated_objects": migrated_count
             }
             
+        except requests.exceptions.ConnectionError:
+            raise
         except Exception as e:
             return {"error": str(e)}
     
@@ -175,56 +385,97 @@ class WeaviateManager:
         try:
             self.client.schema.delete_class(class_name)
             return {"message": f"Successfully deleted class {class_name}"}
+        except requests.exceptions.ConnectionError:
+            raise
         except Exception as e:
             return {"error": str(e)}
     
-    def search_across_classes(self, query: str, limit: int = 10) -> Dict[str, Any]:
+    def _probe_class(self, class_name: str, text_props: List[str], query: str) -> bool:
+        """Cheap BM25 probe (blocking): does this class plausibly match?
+
+        Classes whose best keyword score is negligible skip the embedding
+        lookup + HNSW traversal entirely.
+        """
+        probe = (self.client.query
+                .get(class_name, text_props[:1])
+                .with_bm25(query=query)
+                .with_limit(1)
+                .with_additional(['score'])
+                .do())
+        hits = probe.get('data', {}).get('Get', {}).get(class_name, [])
+        best_score = float(hits[0].get('_additional', {}).get('score') or 0) if hits else 0.0
+        return best_score >= BM25_PREFILTER_MIN_SCORE
+
+    async def search_across_classes(self, query: str, limit: int = 10) -> Dict[str, Any]:
         """Search across all classes for relevant content"""
         if not self.client:
             return {"error": "Not connected to Weaviate"}
-        
+
         try:
-            schema = self.client.schema.get()
-            all_results = []
-            
-            for cls in schema.get('classes', []):
-                class_name = cls.get('class')
-                
-                # Get text properties for this class
-                text_props = [p['name'] for p in cls.get('properties', []) 
-                             if 'text' in p.get('dataType', [])]
-                
-                if not text_props:
+            await self._get_schema_cached()
+
+            # The text-property index is precomputed whenever the schema cache
+            # refreshes, so each search is a dict walk instead of re-deriving
+            # properties for every class
+            searchable = [(class_name, text_props)
+                          for class_name, text_props in self._text_props_index.items()
+                          if text_props]
+
+            # Concurrent BM25 probes decide which classes warrant vector search
+            probes = await asyncio.gather(
+                *(asyncio.to_thread(self._probe_class, class_name, text_props, query)
+                  for class_name, text_props in searchable),
+                return_exceptions=True
+            )
+
+            failed_classes = {}
+            selected = []
+            for (class_name, text_props), relevant in zip(searchable, probes):
+                if isinstance(relevant, BaseException):
+                    if not isinstance(relevant, _TRANSIENT_ERRORS):
+                        raise relevant
+                    # Record the failure so callers can retry just this class
+                    logger.debug(f"Probe of {class_name} failed: {relevant}")
+                    failed_classes[class_name] = str(relevant)
                     continue
-                
-                try:
-                    # Search in this class
-                    result = (self.client.query
-                             .get(class_name, text_props[:5])  # Limit to first 5 text properties
-                             .with_near_text({"concepts": [query]})
-                             .with_limit(limit)
-                             .with_additional(['distance'])
-                             .do())
-                    
-                    objects = result.get('data', {}).get('Get', {}).get(class_name, [])
-                    for obj in objects:
+                if relevant:
+                    selected.append((class_name, text_props))
+
+            all_results = []
+            if selected:
+                # One GraphQL document covers every selected class, collapsing
+                # N near-text round-trips into a single request
+                concepts = json.dumps([query])
+                selections = " ".join(
+                    f'{class_name}(nearText: {{concepts: {concepts}}}, limit: {limit}) '
+                    f'{{ {" ".join(text_props)} _additional {{ distance }} }}'
+                    for class_name, text_props in selected
+                )
+                raw = await asyncio.to_thread(self.client.query.raw, "{ Get { " + selections + " } }")
+                get_data = raw.get('data', {}).get('Get', {}) or {}
+                for class_name, _ in selected:
+                    for obj in get_data.get(class_name) or []:
                         all_results.append({
                             'class': class_name,
                             'data': obj,
                             'distance': obj.get('_additional', {}).get('distance', 1.0)
                         })
-                except:
-                    continue
-            
-            # Sort by distance (lower is better)
-            all_results.sort(key=lambda x: x['distance'])
-            
-            return {
+
+            # Keep only the best `limit` hits (lower distance is better);
+            # nsmallest is O(N log limit) vs O(N log N) for a full sort
+            top_results = heapq.nsmallest(limit, all_results, key=lambda x: x['distance'])
+
+            response = {
                 "query": query,
                 "total_results": len(all_results),
-                "results": all_results[:limit]
+                "results": top_results
             }
-            
+            if failed_classes:
+                response["failed_classes"] = failed_classes
+            return response
+
+        except requests.exceptions.ConnectionError:
+            raise
         except Exception as e:
             return {"error": str(e)}
 
@@ -322,44 +573,62 @@ async def handle_list_tools() -> List[Tool]:
 @server.call_tool()
 async def handle_call_tool(name: str, arguments: Optional[Dict[str, Any]]) -> List[TextContent]:
     """Handle tool execution"""
-    
-    # Ensure connection
-    if not weaviate_manager.client or not weaviate_manager.client.is_ready():
-        if not weaviate_manager.connect():
-            return [TextContent(type="text", text=json.dumps({"error": "Failed to connect to Weaviate"}))]
-    
-    try:
+
+    async def dispatch():
         if name == "weaviate_schema_info":
-            result = weaviate_manager.get_schema_info()
-            
+            return await weaviate_manager._guarded("schema_info", weaviate_manager.get_schema_info)
+
         elif name == "weaviate_cleanup_class":
             class_name = arguments.get("class_name")
             keep_recent = arguments.get("keep_recent", True)
             days = arguments.get("days", 30)
-            result = weaviate_manager.cleanup_class(class_name, keep_recent, days)
-            
+            return await weaviate_manager._guarded(
+                "cleanup_class",
+                lambda: weaviate_manager._aio(weaviate_manager.cleanup_class, class_name, keep_recent, days))
+
         elif name == "weaviate_merge_classes":
             source_class = arguments.get("source_class")
             target_class = arguments.get("target_class")
-            result = weaviate_manager.merge_duplicate_classes(source_class, target_class)
-            
+            return await weaviate_manager._guarded(
+                "merge_classes",
+                lambda: weaviate_manager._aio(weaviate_manager.merge_duplicate_classes, source_class, target_class))
+
         elif name == "weaviate_delete_class":
             class_name = arguments.get("class_name")
-            result = weaviate_manager.delete_class(class_name)
-            
+            return await weaviate_manager._guarded(
+                "delete_class",
+                lambda: weaviate_manager._aio(weaviate_manager.delete_class, class_name))
+
         elif name == "weaviate_search":
             query = arguments.get("query")
             limit = arguments.get("limit", 10)
-            result = weaviate_manager.search_across_classes(query, limit)
-            
+            return await weaviate_manager._guarded(
+                "search", lambda: weaviate_manager.search_across_classes(query, limit))
+
         else:
-            result = {"error": f"Unknown tool: {name}"}
-        
-        return [TextContent(type="text", text=json.dumps(result, indent=2))]
-        
+            return {"error": f"Unknown tool: {name}"}
+
+    # Connect lazily; the client is reused for the process lifetime so the
+    # hot path pays no is_ready() round-trip per call
+    if not weaviate_manager.connect():
+        return [TextContent(type="text", text=_encode({"error": "Failed to connect to Weaviate"}))]
+
+    try:
+        try:
+            result = await dispatch()
+        except requests.exceptions.ConnectionError:
+            # Connection went stale - rebuild the client once and retry
+            logger.warning("Weaviate connection lost, reconnecting...")
+            weaviate_manager.client = None
+            if not weaviate_manager.connect():
+                return [TextContent(type="text", text=_encode({"error": "Failed to connect to Weaviate"}))]
+            result = await dispatch()
+
+        return [TextContent(type="text", text=_encode(result))]
+
     except Exception as e:
         logger.error(f"Error executing tool {name}: {e}")
-        return [TextContent(type="text", text=json.dumps({"error": str(e)}))]
+        return [TextContent(type="text", text=_encode({"error": str(e)}))]
 
 async def main():
     """Run the MCP server"""
@@ -7,10 +7,41 @@ Works directly with Claude Desktop without external MCP dependencies
 import sys
 import json
 import asyncio
+import heapq
+import logging
+import time
+import requests
 import weaviate
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Failures worth absorbing when fetching counts: a flaky query should not
+# take down schema info, but anything else must surface
+_COUNT_ERRORS = (
+    requests.RequestException,
+    weaviate.exceptions.UnexpectedStatusCodeException,
+)
+
+# Frame codec for the stdio transport. orjson parses and emits bytes at C
+# speed; fall back to the stdlib where it is not installed. The tool-result
+# payloads keep stdlib indent=2 since those are read by humans.
+try:
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dump_frame(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    _loads = json.loads
+
+    def _dump_frame(obj) -> bytes:
+        return json.dumps(obj).encode()
+
 # Weaviate configuration
 WEAVIATE_URL = "https://weaviate-production-5bc1.up.railway.app"
 
@@ -20,7 +51,38 @@ class WeaviateManager:
     def __init__(self, url: str):
         self.url = url
         self.client = None
-        
+        # Short-TTL caches: the schema and readiness barely change between
+        # requests, so skip the extra round-trips on the hot path
+        self._schema_cache = None
+        self._schema_cache_ts = 0.0
+        self._schema_ttl = 30
+        # Derived once per schema refresh: class name -> first 5 text props
+        self._text_props_cache = {}
+        self._ready_cache = False
+        self._ready_cache_ts = 0.0
+        self._ready_ttl = 5
+
+    def _schema(self):
+        """Return the schema, refetching at most every _schema_ttl seconds"""
+        now = time.monotonic()
+        if self._schema_cache is None or now - self._schema_cache_ts >= self._schema_ttl:
+            self._schema_cache = self.client.schema.get()
+            self._schema_cache_ts = now
+            self._text_props_cache = {
+                cls.get('class'): [p['name'] for p in cls.get('properties', [])
+                                   if 'text' in p.get('dataType', [])][:5]
+                for cls in self._schema_cache.get('classes', [])
+            }
+        return self._schema_cache
+
+    def is_ready(self):
+        """Cached wrapper around client.is_ready()"""
+        now = time.monotonic()
+        if not self._ready_cache or now - self._ready_cache_ts >= self._ready_ttl:
+            self._ready_cache = bool(self.client) and self.client.is_ready()
+            self._ready_cache_ts = now
+        return self._ready_cache
+
     def connect(self):
         """Connect to Weaviate instance"""
         try:
@@ -41,24 +103,35 @@ class WeaviateManager:
             return {"error": "Not connected to Weaviate"}
         
         try:
-            schema = self.client.schema.get()
+            schema = self._schema()
             meta = self.client.get_meta()
-            
-            # Get detailed info for each class
+
+            class_names = [cls.get('class') for cls in schema.get('classes', [])]
+
+            # One aliased Aggregate query fetches every count in a single
+            # round-trip instead of one query per class
+            counts = {}
+            if class_names:
+                aliases = " ".join(
+                    f"c{i}: {name} {{ meta {{ count }} }}"
+                    for i, name in enumerate(class_names)
+                )
+                try:
+                    result = self.client.query.raw(f"{{ Aggregate {{ {aliases} }} }}")
+                    aggregate = result.get('data', {}).get('Aggregate', {})
+                    for i, name in enumerate(class_names):
+                        entries = aggregate.get(f"c{i}") or [{}]
+                        counts[name] = entries[0].get('meta', {}).get('count', 0)
+                except _COUNT_ERRORS as e:
+                    # Counts degrade to 0 below; say so instead of hiding it
+                    logger.warning(f"Aggregate count query failed: {e}")
+
             class_info = []
             for cls in schema.get('classes', []):
                 class_name = cls.get('class')
-                
-                # Get object count
-                try:
-                    result = self.client.query.aggregate(class_name).with_meta_count().do()
-                    count = result.get('data', {}).get('Aggregate', {}).get(class_name, [{}])[0].get('meta', {}).get('count', 0)
-                except:
-                    count = 0
-                
                 class_info.append({
                     'name': class_name,
-                    'object_count': count,
+                    'object_count': counts.get(class_name, 0),
                     'properties': [{'name': p.get('name'), 'dataType': p.get('dataType')} for p in cls.get('properties', [])]
                 })
             
@@ -76,33 +149,49 @@ class WeaviateManager:
             return {"error": "Not connected to Weaviate"}
         
         try:
-            # Get all objects from the class
-            result = self.client.query.get(class_name).with_additional(['id', 'creationTimeUnix']).do()
-            objects = result.get('data', {}).get('Get', {}).get(class_name, [])
-            
-            if not objects:
+            # Count via a cheap aggregate instead of fetching every object.
+            # A failed count falls through to the outer handler's error
+            # return - defaulting to 0 would report the class as empty.
+            result = self.client.query.aggregate(class_name).with_meta_count().do()
+            total_objects = result.get('data', {}).get('Aggregate', {}).get(class_name, [{}])[0].get('meta', {}).get('count', 0)
+
+            if not total_objects:
                 return {"message": f"No objects found in class {class_name}"}
-            
+
             deleted_count = 0
-            
+
             # If keep_recent is True, only delete objects older than specified days
             if keep_recent:
-                cutoff_time = datetime.now().timestamp() - (days * 24 * 60 * 60)
-                for obj in objects:
-                    creation_time = obj.get('_additional', {}).get('creationTimeUnix', 0) / 1000
-                    if creation_time < cutoff_time:
-                        obj_id = obj.get('_additional', {}).get('id')
-                        if obj_id:
-                            self.client.data_object.delete(obj_id, class_name)
-                            deleted_count += 1
-            
+                cutoff_ms = int((datetime.now().timestamp() - days * 24 * 60 * 60) * 1000)
+                # One server-side batch delete replaces the per-object DELETE
+                # loop. Timestamp filters take the epoch-millis value as a
+                # string (valueText).
+                try:
+                    result = self.client.batch.delete_objects(
+                        class_name=class_name,
+                        where={
+                            "path": ["_creationTimeUnix"],
+                            "operator": "LessThan",
+                            "valueText": str(cutoff_ms)
+                        },
+                        output="minimal"
+                    )
+                except Exception as e:
+                    return {
+                        "error": f"Timestamp-filtered delete failed: {e}. "
+                                 f"Filtering on _creationTimeUnix requires "
+                                 f"invertedIndexConfig.indexTimestamps to be "
+                                 f"enabled on class {class_name}."
+                    }
+                deleted_count = result.get("results", {}).get("successful", 0)
+
             return {
                 "class": class_name,
-                "total_objects": len(objects),
+                "total_objects": total_objects,
                 "deleted_objects": deleted_count,
-                "remaining_objects": len(objects) - deleted_count
+                "remaining_objects": total_objects - deleted_count
             }
-            
+
         except Exception as e:
             return {"error": str(e)}
     
@@ -112,45 +201,46 @@ class WeaviateManager:
             return {"error": "Not connected to Weaviate"}
         
         try:
-            schema = self.client.schema.get()
-            all_results = []
-            
-            for cls in schema.get('classes', []):
-                class_name = cls.get('class')
-                
-                # Get text properties for this class
-                text_props = [p['name'] for p in cls.get('properties', []) 
-                             if 'text' in p.get('dataType', [])]
-                
-                if not text_props:
-                    continue
-                
+            self._schema()  # refresh the derived text-props map if stale
+
+            # The per-class text properties were computed when the schema
+            # was cached - the search path is just a dict scan
+            searchable = [(name, props) for name, props in self._text_props_cache.items() if props]
+
+            def search_class(item):
+                class_name, text_props = item
                 try:
-                    # Search in this class
                     result = (self.client.query
-                             .get(class_name, text_props[:5])  # Limit to first 5 text properties
+                             .get(class_name, text_props)
                              .with_near_text({"concepts": [query]})
                              .with_limit(limit)
                              .with_additional(['distance'])
                              .do())
-                    
-                    objects = result.get('data', {}).get('Get', {}).get(class_name, [])
-                    for obj in objects:
-                        all_results.append({
-                            'class': class_name,
-                            'data': obj,
-                            'distance': obj.get('_additional', {}).get('distance', 1.0)
-                        })
+                    return class_name, result.get('data', {}).get('Get', {}).get(class_name, [])
                 except:
-                    continue
-            
-            # Sort by distance (lower is better)
-            all_results.sort(key=lambda x: x['distance'])
+                    return class_name, []
+
+            # Each near-text query is an independent round-trip; fan them out
+            # so total latency is the slowest class, not the sum
+            all_results = []
+            if searchable:
+                with ThreadPoolExecutor(max_workers=min(8, len(searchable))) as executor:
+                    for class_name, objects in executor.map(search_class, searchable):
+                        for obj in objects:
+                            all_results.append({
+                                'class': class_name,
+                                'data': obj,
+                                'distance': obj.get('_additional', {}).get('distance', 1.0)
+                            })
             
+            # Only the top `limit` hits are returned, so select them with a
+            # bounded heap instead of sorting the whole merged list
+            top_results = heapq.nsmallest(limit, all_results, key=lambda x: x['distance'])
+
             return {
                 "query": query,
                 "total_results": len(all_results),
-                "results": all_results[:limit]
+                "results": top_results
             }
             
         except Exception as e:
@@ -159,15 +249,15 @@ class WeaviateManager:
 # Initialize Weaviate manager
 weaviate_manager = WeaviateManager(WEAVIATE_URL)
 
-def handle_request(request):
+async def handle_request(request):
     """Handle incoming MCP requests"""
     method = request.get("method")
     params = request.get("params", {})
     request_id = request.get("id")
     
     # Ensure connection
-    if not weaviate_manager.client or not weaviate_manager.client.is_ready():
-        if not weaviate_manager.connect():
+    if not weaviate_manager.client or not await asyncio.to_thread(weaviate_manager.is_ready):
+        if not await asyncio.to_thread(weaviate_manager.connect):
             return {
                 "jsonrpc": "2.0",
                 "id": request_id,
@@ -238,17 +328,19 @@ def handle_request(request):
         arguments = params.get("arguments", {})
         
         try:
+            # The weaviate client is blocking HTTP - run it off the loop so
+            # other in-flight requests keep moving
             if tool_name == "weaviate_schema_info":
-                result = weaviate_manager.get_schema_info()
+                result = await asyncio.to_thread(weaviate_manager.get_schema_info)
             elif tool_name == "weaviate_cleanup_class":
                 class_name = arguments.get("class_name")
                 keep_recent = arguments.get("keep_recent", True)
                 days = arguments.get("days", 30)
-                result = weaviate_manager.cleanup_class(class_name, keep_recent, days)
+                result = await asyncio.to_thread(weaviate_manager.cleanup_class, class_name, keep_recent, days)
             elif tool_name == "weaviate_search":
                 query = arguments.get("query")
                 limit = arguments.get("limit", 10)
-                result = weaviate_manager.search_across_classes(query, limit)
+                result = await asyncio.to_thread(weaviate_manager.search_across_classes, query, limit)
             else:
                 result = {"error": f"Unknown tool: {tool_name}"}
             
@@ -294,33 +386,58 @@ def handle_request(request):
             "error": {"code": -32601, "message": f"Method not found: {method}"}
         }
 
+# Responses from concurrent requests must not interleave on stdout
+_stdout_lock = asyncio.Lock()
+
+# Strong references to in-flight request tasks: the event loop only keeps
+# weak ones, so an unreferenced task can be garbage-collected mid-request
+_pending_tasks = set()
+
+async def _process_and_write(request):
+    """Handle one request and write its response line under the stdout lock"""
+    response = await handle_request(request)
+    async with _stdout_lock:
+        sys.stdout.buffer.write(_dump_frame(response) + b"\n")
+        sys.stdout.buffer.flush()
+
 async def main():
     """Run the MCP server"""
     # Connect to Weaviate on startup
     weaviate_manager.connect()
-    
+
+    # Read stdin through a non-blocking StreamReader instead of bouncing
+    # every readline through the default thread pool
+    loop = asyncio.get_event_loop()
+    reader = asyncio.StreamReader()
+    protocol = asyncio.StreamReaderProtocol(reader)
+    await loop.connect_read_pipe(lambda: protocol, sys.stdin)
+
     while True:
         try:
             # Read request from stdin
-            line = await asyncio.get_event_loop().run_in_executor(None, sys.stdin.readline)
+            line = await reader.readline()
             if not line:
                 break
             
-            request = json.loads(line)
-            response = handle_request(request)
-            
-            # Write response to stdout
-            print(json.dumps(response))
-            sys.stdout.flush()
-            
+            request = _loads(line)
+            # Schedule rather than await: multiple tools/call requests can
+            # be in flight against Weaviate at once
+            task = asyncio.create_task(_process_and_write(request))
+            _pending_tasks.add(task)
+            task.add_done_callback(_pending_tasks.discard)
+
         except Exception as e:
             error_response = {
                 "jsonrpc": "2.0",
                 "id": None,
                 "error": {"code": -32700, "message": f"Parse error: {str(e)}"}
             }
-            print(json.dumps(error_response))
-            sys.stdout.flush()
+            sys.stdout.buffer.write(_dump_frame(error_response) + b"\n")
+            sys.stdout.buffer.flush()
+
+    # stdin hit EOF - drain outstanding responses instead of abandoning them
+    if _pending_tasks:
+        await asyncio.gather(*_pending_tasks, return_exceptions=True)
 
 if __name__ == "__main__":
     asyncio.run(main())
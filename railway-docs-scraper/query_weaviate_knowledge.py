@@ -18,23 +18,19 @@ class WeaviateKnowledgeQuery:
         
         # Query for deployment-related docs
         deployment_keywords = ["deploy", "dockerfile", "build", "environment", "variables", "config", "railway.json", "nixpacks"]
-        
-        results = []
-        for keyword in deployment_keywords:
-            query = (
-                self.client.query
-                .get("RailwayDocs", ["title", "content", "url"])
-                .with_where({
-                    "path": ["content"],
-                    "operator": "Like",
-                    "valueText": f"*{keyword}*"
-                })
-                .with_limit(5)
-            )
-            result = query.do()
-            docs = result.get('data', {}).get('Get', {}).get('RailwayDocs', [])
-            results.extend(docs)
-            
+
+        # BM25 hits the inverted index directly and ranks by relevance -
+        # unlike the old leading-wildcard Like filters, which forced a full
+        # tokenized scan per keyword
+        query = (
+            self.client.query
+            .get("RailwayDocs", ["title", "content", "url"])
+            .with_bm25(query=" ".join(deployment_keywords), properties=["content"])
+            .with_limit(40)
+        )
+        result = query.do()
+        results = result.get('data', {}).get('Get', {}).get('RailwayDocs', [])
+
         # Remove duplicates
         seen_urls = set()
         unique_results = []
@@ -42,7 +38,7 @@ class WeaviateKnowledgeQuery:
             if doc['url'] not in seen_urls:
                 seen_urls.add(doc['url'])
                 unique_results.append(doc)
-                
+
         print(f"Found {len(unique_results)} relevant deployment docs")
         return unique_results
     
@@ -54,11 +50,7 @@ class WeaviateKnowledgeQuery:
         api_query = (
             self.client.query
             .get("Document", ["title", "content", "api_key", "endpoint", "service_name"])
-            .with_where({
-                "path": ["content"],
-                "operator": "Like", 
-                "valueText": "*api*key*"
-            })
+            .with_bm25(query="api key", properties=["content"])
             .with_limit(20)
         )
         
@@ -69,11 +61,7 @@ class WeaviateKnowledgeQuery:
         cohere_query = (
             self.client.query
             .get("CohereKnowledge", ["title", "content"])
-            .with_where({
-                "path": ["content"],
-                "operator": "Like",
-                "valueText": "*api*"
-            })
+            .with_bm25(query="api", properties=["content"])
             .with_limit(10)
         )
         
@@ -4,13 +4,27 @@ Railway Project Cleanup Script
 Deletes specified Railway projects using the API
 """
 
+import os
 import requests
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
-# Railway API configuration
-RAILWAY_API_TOKEN = "ce03376f-6cf9-43ea-b678-12055cc20a7c"
+# Railway API configuration - the token must come from the environment,
+# never from source
+RAILWAY_API_TOKEN = os.environ.get("RAILWAY_API_TOKEN")
+if not RAILWAY_API_TOKEN:
+    sys.exit("RAILWAY_API_TOKEN environment variable is not set")
 RAILWAY_API_URL = "https://backboard.railway.app/graphql/v2"
 
+# One pooled session for every API call - deletes run concurrently, so keep
+# a connection per worker instead of a fresh TLS handshake per request
+SESSION = requests.Session()
+SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10))
+SESSION.headers.update({
+    "Authorization": f"Bearer {RAILWAY_API_TOKEN}",
+    "Content-Type": "application/json"
+})
+
 # Projects to delete
 PROJECTS_TO_DELETE = [
     "mcp-max-v1",
@@ -25,48 +39,6 @@ PROJECTS_TO_DELETE = [
     "32gb-windsurf"
 ]
 
-def get_project_id(project_name):
-    """Get project ID by name"""
-    query = """
-    query {
-        projects {
-            edges {
-                node {
-                    id
-                    name
-                }
-            }
-        }
-    }
-    """
-    
-    headers = {
-        "Authorization": f"Bearer {RAILWAY_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    response = requests.post(RAILWAY_API_URL, json={"query": query}, headers=headers)
-    
-    if response.status_code != 200:
-        print(f"API Error: {response.status_code}")
-        print(response.text)
-        return None
-        
-    data = response.json()
-    
-    if "errors" in data:
-        print(f"GraphQL Errors: {data['errors']}")
-        return None
-    
-    if "data" not in data or "projects" not in data["data"]:
-        print(f"Unexpected response structure: {data}")
-        return None
-    
-    for edge in data["data"]["projects"]["edges"]:
-        if edge["node"]["name"] == project_name:
-            return edge["node"]["id"]
-    return None
-
 def delete_project(project_id, project_name):
     """Delete a project by ID"""
     mutation = """
@@ -75,13 +47,8 @@ def delete_project(project_id, project_name):
     }
     """
     
-    headers = {
-        "Authorization": f"Bearer {RAILWAY_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
     variables = {"projectId": project_id}
-    response = requests.post(RAILWAY_API_URL, json={"query": mutation, "variables": variables}, headers=headers)
+    response = SESSION.post(RAILWAY_API_URL, json={"query": mutation, "variables": variables})
     
     if response.status_code == 200:
         print(f"✅ Deleted: {project_name}")
@@ -126,14 +93,14 @@ def main():
     }
     """
     
-    headers = {
-        "Authorization": f"Bearer {RAILWAY_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    response = requests.post(RAILWAY_API_URL, json={"query": query}, headers=headers)
+    response = SESSION.post(RAILWAY_API_URL, json={"query": query})
     data = response.json()
     
+    # One fetch serves both the duplicate check and every delete lookup -
+    # get_project_id used to re-query the full project list per name
+    name_to_id = {edge["node"]["name"]: edge["node"]["id"]
+                  for edge in data["data"]["me"]["projects"]["edges"]}
+
     mcp_v2_projects = []
     for edge in data["data"]["me"]["projects"]["edges"]:
         if edge["node"]["name"] == "mcp-max-v2":
@@ -157,15 +124,17 @@ def main():
                 delete_project(proj["id"], "mcp-max-v2 (duplicate)")
                 break
     
-    # Delete all projects in the list
-    deleted_count = 0
-    for project_name in PROJECTS_TO_DELETE:
-        project_id = get_project_id(project_name)
-        if project_id:
-            if delete_project(project_id, project_name):
-                deleted_count += 1
-        else:
+    # Delete all projects in the list concurrently - each delete is an
+    # independent mutation, so total time is the slowest one, not the sum
+    def _delete_by_name(project_name):
+        project_id = name_to_id.get(project_name)
+        if not project_id:
             print(f"⚠️  Not found: {project_name}")
+            return False
+        return delete_project(project_id, project_name)
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        deleted_count = sum(executor.map(_delete_by_name, PROJECTS_TO_DELETE))
     
     print(f"\n✨ Cleanup complete! Deleted {deleted_count} projects.")
 
@@ -9,11 +9,47 @@ import sys
 import json
 import subprocess
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, Any
 
-# Railway API configuration
+# Serializer for request bodies: orjson emits bytes at C speed; fall back
+# to the stdlib encoder where it is not installed
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+try:
+    def _dumps_pretty(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    _dumps_pretty({})
+except NameError:
+    def _dumps_pretty(obj) -> bytes:
+        return json.dumps(obj, indent=2).encode()
+
+# Railway API configuration - the token comes from the environment so it
+# can be rotated (and the image reused across environments) without a
+# code change; main() bails early when it is missing
 RAILWAY_API_URL = "https://backboard.railway.app/graphql/v2"
-RAILWAY_TOKEN = "ce03376f-6cf9-43ea-b678-12055cc20a7c"
+RAILWAY_TOKEN = os.environ.get("RAILWAY_TOKEN")
+
+# One session for every API call - keep-alive skips the TCP+TLS handshake
+# on each mutation, and transient gateway errors retry with backoff
+_session = requests.Session()
+_session.headers.update({
+    "Authorization": f"Bearer {RAILWAY_TOKEN}",
+    "Content-Type": "application/json"
+})
+_session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+))
 
 # Project configuration
 PROJECT_NAME = "mcp-max-v2"
@@ -33,50 +69,114 @@ ENV_VARS = {
     "PORT": "8000"
 }
 
-def make_graphql_request(query: str, variables: Dict[str, Any] = None) -> Dict[str, Any]:
-    """Make a GraphQL request to Railway API"""
-    headers = {
-        "Authorization": f"Bearer {RAILWAY_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    payload = {"query": query}
-    if variables:
-        payload["variables"] = variables
-    
-    response = requests.post(RAILWAY_API_URL, json=payload, headers=headers)
-    response.raise_for_status()
-    return response.json()
+# Deployment configuration, emitted verbatim - the file is small and static,
+# so a literal beats importing a TOML serializer for it
+RAILWAY_TOML = """\
+[build]
+builder = "DOCKERFILE"
+dockerfilePath = "./deployment/docker/Dockerfile.railway"
 
-def create_project():
-    """Create a new Railway project"""
-    query = """
-    mutation CreateProject($input: ProjectCreateInput!) {
-        projectCreate(input: $input) {
-            id
-            name
-            environments {
-                edges {
-                    node {
-                        id
-                        name
-                    }
+[deploy]
+startCommand = "gunicorn mcp_hub.main:app --workers 16 --worker-class uvicorn.workers.UvicornWorker --bind 0.0.0.0:8000"
+healthcheckPath = "/health"
+healthcheckTimeout = 300
+restartPolicyType = "ON_FAILURE"
+restartPolicyMaxRetries = 3
+"""
+
+# Query strings are static - build them (and any fully static payloads)
+# once at import instead of per call
+_CREATE_PROJECT_QUERY = """
+mutation CreateProject($input: ProjectCreateInput!) {
+    projectCreate(input: $input) {
+        id
+        name
+        environments {
+            edges {
+                node {
+                    id
+                    name
                 }
             }
         }
     }
-    """
-    
-    variables = {
+}
+"""
+
+_VALIDATE_PROJECT_QUERY = """
+query Project($id: String!) {
+    project(id: $id) {
+        id
+    }
+}
+"""
+
+_SET_ENV_VARS_QUERY = """
+mutation SetEnvVars($projectId: String!, $environmentId: String!, $variables: EnvironmentVariablesInput!) {
+    variableCollectionUpsert(
+        projectId: $projectId
+        environmentId: $environmentId
+        variables: $variables
+    )
+}
+"""
+
+# Saved IDs from a previous run - lets reruns skip the network phase
+PROJECT_STATE_FILE = ".railway-project.json"
+
+# The project-create payload has no dynamic parts, so serialize it once
+_CREATE_PROJECT_PAYLOAD = _dumps({
+    "query": _CREATE_PROJECT_QUERY,
+    "variables": {
         "input": {
             "name": PROJECT_NAME,
             "description": "MCP Hub for 20+ services - Optimized for 32 vCPU/32GB RAM",
             "isPublic": False
         }
     }
-    
+})
+
+def load_existing_project():
+    """Return (project_id, environment_id) from saved state if still valid
+
+    Reads PROJECT_STATE_FILE and confirms the project still exists with one
+    cheap query; returns None when the file is missing, malformed, or the
+    project is gone, so the caller falls back to creating a fresh one.
+    """
     try:
-        result = make_graphql_request(query, variables)
+        with open(PROJECT_STATE_FILE) as f:
+            state = json.load(f)
+        project_id = state["projectId"]
+        environment_id = state["environmentId"]
+    except (OSError, KeyError, ValueError):
+        return None
+
+    try:
+        result = make_graphql_request(_VALIDATE_PROJECT_QUERY, {"id": project_id})
+        if result.get("data", {}).get("project"):
+            return project_id, environment_id
+    except Exception:
+        pass
+    return None
+
+def make_graphql_request(query: str, variables: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Make a GraphQL request to Railway API"""
+    payload = {"query": query}
+    if variables:
+        payload["variables"] = variables
+
+    # data= with pre-encoded bytes skips requests' own json.dumps pass;
+    # the session already carries the JSON Content-Type header
+    response = _session.post(RAILWAY_API_URL, data=_dumps(payload))
+    response.raise_for_status()
+    return response.json()
+
+def create_project():
+    """Create a new Railway project"""
+    try:
+        response = _session.post(RAILWAY_API_URL, data=_CREATE_PROJECT_PAYLOAD)
+        response.raise_for_status()
+        result = response.json()
         project = result["data"]["projectCreate"]
         print(f"✅ Created project: {project['name']} (ID: {project['id']})")
         
@@ -92,16 +192,6 @@ def create_project():
 
 def set_environment_variables(project_id: str, environment_id: str):
     """Set environment variables for the project"""
-    query = """
-    mutation SetEnvVars($projectId: String!, $environmentId: String!, $variables: EnvironmentVariablesInput!) {
-        variableCollectionUpsert(
-            projectId: $projectId
-            environmentId: $environmentId
-            variables: $variables
-        )
-    }
-    """
-    
     # Convert env vars to Railway format
     railway_vars = {}
     for key, value in ENV_VARS.items():
@@ -114,7 +204,7 @@ def set_environment_variables(project_id: str, environment_id: str):
     }
     
     try:
-        make_graphql_request(query, variables)
+        make_graphql_request(_SET_ENV_VARS_QUERY, variables)
         print(f"✅ Set {len(ENV_VARS)} environment variables")
     except Exception as e:
         print(f"❌ Failed to set environment variables: {e}")
@@ -122,44 +212,35 @@ def set_environment_variables(project_id: str, environment_id: str):
 def setup_deployment_config(project_id: str):
     """Configure deployment settings"""
     # Create railway.toml for deployment configuration
-    config = {
-        "build": {
-            "builder": "DOCKERFILE",
-            "dockerfilePath": "./deployment/docker/Dockerfile.railway"
-        },
-        "deploy": {
-            "startCommand": "gunicorn mcp_hub.main:app --workers 16 --worker-class uvicorn.workers.UvicornWorker --bind 0.0.0.0:8000",
-            "healthcheckPath": "/health",
-            "healthcheckTimeout": 300,
-            "restartPolicyType": "ON_FAILURE",
-            "restartPolicyMaxRetries": 3
-        }
-    }
-    
     with open("railway.toml", "w") as f:
-        import toml
-        toml.dump(config, f)
+        f.write(RAILWAY_TOML)
     
     print("✅ Created railway.toml configuration")
 
-def main():
-    """Main setup function"""
-    print("🚀 Setting up MCP Max v2 on Railway...")
+def _run_setup():
+    """Create the project, set env vars and write deployment config"""
     
     # Check if we're in the right directory
     if not os.path.exists("mcp-hub"):
         print("❌ Please run this script from the project root directory")
         sys.exit(1)
     
-    # Create project
-    project_id, environment_id = create_project()
-    
-    if not environment_id:
-        print("❌ Could not find production environment")
-        sys.exit(1)
-    
-    # Set environment variables
-    set_environment_variables(project_id, environment_id)
+    # Reruns are common in CI - reuse the saved project when it still
+    # exists instead of re-creating and re-configuring it
+    existing = load_existing_project()
+    if existing:
+        project_id, environment_id = existing
+        print(f"✅ Reusing existing project (ID: {project_id})")
+    else:
+        # Create project
+        project_id, environment_id = create_project()
+
+        if not environment_id:
+            print("❌ Could not find production environment")
+            sys.exit(1)
+
+        # Set environment variables
+        set_environment_variables(project_id, environment_id)
     
     # Setup deployment config
     setup_deployment_config(project_id)
@@ -170,12 +251,22 @@ def main():
     print("\n🚂 To deploy, run: railway up")
     
     # Save project info for future use
-    with open(".railway-project.json", "w") as f:
-        json.dump({
+    with open(PROJECT_STATE_FILE, "wb") as f:
+        f.write(_dumps_pretty({
             "projectId": project_id,
             "environmentId": environment_id,
             "projectName": PROJECT_NAME
-        }, f, indent=2)
+        }))
+
+def main():
+    """Main setup function"""
+    if not RAILWAY_TOKEN:
+        sys.exit("RAILWAY_TOKEN environment variable is not set")
+
+    print("🚀 Setting up MCP Max v2 on Railway...")
+
+    with _session:
+        _run_setup()
 
 if __name__ == "__main__":
     main()
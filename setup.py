@@ -1,4 +1,4 @@
-from setuptools import setup, find_packages
+from setuptools import setup
 
 with open("README.md", "r", encoding="utf-8") as fh:
     long_description = fh.read()
@@ -13,7 +13,9 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/yourusername/mcp-max-v2",
     package_dir={"": "src"},
-    packages=find_packages(where="src"),
+    # Declared statically - src/ holds a single package, so there is no
+    # reason to pay a find_packages directory walk on every build
+    packages=["mcp_max_v2"],
     python_requires=">=3.8",
     classifiers=[
         "Programming Language :: Python :: 3",